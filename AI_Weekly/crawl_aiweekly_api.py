@@ -1,298 +1,440 @@
-"""Crawl latest AI Weekly issue (https://aiweekly.co/) and save external article titles + contents.
-
-Usage:
-    python crawl_aiweekly_api.py --limit 20 --out data/aiweekly.jsonl
-
-The script performs:
-1. Fetch https://aiweekly.co/ home page to locate the first /issues/<id> link (assumed newest issue).
-2. Parse that issue page to get publication date and all external article URLs.
-3. Visit each external link (up to --limit) and extract title + textual content.
-4. Write JSON Lines with fields: url, title, date, content.
-"""
-from __future__ import annotations
-
-import json
-import random
-import re
-import time
-from pathlib import Path
-from typing import List
-from urllib.parse import urlparse
-
-import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
-import logging
-
-# optional anti-bot helpers
-try:
-    import cloudscraper  # type: ignore
-except ImportError:
-    cloudscraper = None  # noqa: N816
-
-# Playwright is heavy; load lazily only if installed
-try:
-    from playwright.sync_api import sync_playwright  # type: ignore
-except ImportError:
-    sync_playwright = None  # noqa: N816
-
-
-BASE = "https://aiweekly.co"
-HOME = BASE + "/"
-HEADERS = {"User-Agent": "aiweekly-crawler/0.1 (+https://github.com/)"}
-
-
-def fetch_html(url: str, timeout: int = 30) -> str:
-    """Return HTML with progressive fallbacks: requests → cloudscraper → Playwright.
-
-    1. Standard requests (fast)
-    2. cloudscraper for Cloudflare JS challenge (if installed)
-    3. Playwright headless browser (if installed)
-    """
-
-    # ---------------- requests ----------------
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
-        if resp.status_code == 200 and "verify you are human" not in resp.text.lower():
-            return resp.text
-        logging.warning("[fetch_html] requests blocked (%s)", resp.status_code)
-    except Exception as exc:
-        logging.warning("[fetch_html] requests error: %s", exc)
-
-    # ---------------- cloudscraper ----------------
-    if cloudscraper is not None:
-        try:
-            scraper = cloudscraper.create_scraper(
-                browser={"custom": "firefox"}, delay=10
-            )
-            resp = scraper.get(url, headers=HEADERS, timeout=timeout)
-            if resp.status_code == 200:
-                return resp.text
-            logging.warning("[fetch_html] cloudscraper blocked (%s)", resp.status_code)
-        except Exception as exc:
-            logging.warning("[fetch_html] cloudscraper error: %s", exc)
-
-    # ---------------- Playwright ----------------
-    if sync_playwright is None:
-        raise RuntimeError(
-            "All fetch methods failed and Playwright not installed; cannot bypass protection"
-        )
-
-    try:
-        with sync_playwright() as p:
-            # choose an installed Playwright browser (Firefox→Chromium→WebKit)
-            if not p.chromium.executable_path:
-                raise RuntimeError("Chromium browser not installed for Playwright; run `playwright install chromium`")
-
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            page.set_default_navigation_timeout(timeout * 1000)
-            page.goto(url, wait_until="domcontentloaded")
-            html = page.content()
-            browser.close()
-            return html
-    except Exception as exc:
-        raise RuntimeError(f"Playwright failed to fetch {url}: {exc}") from exc
-
-
-def resolve_redirect(url: str, timeout: int = 15) -> str:
-    """Follow redirects for tracking short links (e.g., cur.at) and return final URL."""
-    try:
-        r = requests.head(url, headers=HEADERS, allow_redirects=True, timeout=timeout)
-        final = r.url
-        # Occasionally HEAD may be blocked; fallback to GET with stream=True
-        if final == url:
-            r2 = requests.get(url, headers=HEADERS, allow_redirects=True, timeout=timeout, stream=True)
-            final = r2.url
-        return final
-    except Exception:
-        return url
-
-
-def find_latest_issue_url(home_html: str) -> str:
-    """Return newest issue URL.
-
-    Strategy:
-    1. Scan homepage for any <a> that contains '/issues/<number>'. Accept absolute or relative links.
-    2. If not found, fetch '/issues' archive page and take the first issue link.
-    """
-    soup = BeautifulSoup(home_html, "lxml")
-
-    # 1) direct search on home page
-    for a in soup.find_all("a", href=True):
-        href = a["href"].split("?", 1)[0]
-        if re.search(r"/issues/\d+", href):
-            if not href.startswith("http"):
-                href = BASE + href
-            return href.rstrip("/")
-
-    # 2) fallback: visit /issues page (issue archive)
-    try:
-        archive_html = fetch_html(BASE + "/issues")
-        soup = BeautifulSoup(archive_html, "lxml")
-        first = soup.find("a", href=re.compile(r"/issues/\d+"))
-        if first and first.has_attr("href"):
-            href = first["href"].split("?", 1)[0]
-            if not href.startswith("http"):
-                href = BASE + href
-            return href.rstrip("/")
-    except Exception as exc:
-        print(f"[warn] failed to fetch /issues archive: {exc}")
-
-    raise RuntimeError("Latest issue link not found on aiweekly.co")
-
-
-def parse_issue(issue_html: str) -> tuple[str, List[str]]:
-    """Parse issue page and return (date, list_of_external_urls)."""
-    soup = BeautifulSoup(issue_html, "lxml")
-
-    # Date extraction
-    date_txt = ""
-    time_tag = soup.find("time")
-    if time_tag and time_tag.get_text(strip=True):
-        date_txt = time_tag.get_text(strip=True)
-    else:
-        m = re.search(r"([A-Z][a-z]+\s+\d{1,2}(?:st|nd|rd|th)?\s+\d{4})", soup.get_text(" "))
-        if m:
-            date_txt = m.group(1)
-
-    # Collect external links
-    links: list[str] = []
-    seen: set[str] = set()
-
-    # iterate through category sections; skip sponsor/powered-by/footer ads
-    for section in soup.select("section.category"):
-        cls = section.get("class", [])
-        if any(c in {"cc-powered-by", "cc-sponsorfooter"} for c in cls):
-            continue  # skip advertisement blocks
-
-        for a in section.find_all("a", href=True):
-            href = a["href"].strip()
-            # Skip internal links
-            if href.startswith("/") or "aiweekly.co" in href:
-                continue
-
-            # Normalize by去掉查询串和末尾斜杠，避免 sponsor 短链重复
-            href_norm = href.split("?", 1)[0].rstrip("/")
-
-            if href_norm in seen:
-                continue
-
-            seen.add(href_norm)
-            links.append(href)
-    return date_txt, links
-
-
-def extract_article(url: str) -> tuple[str, str]:
-    """Generic article extractor returning (title, content)."""
-    # Expand tracking short links like cur.at to real destination
-    parsed = urlparse(url)
-    if parsed.netloc.endswith("cur.at"):
-        expanded = resolve_redirect(url)
-        if expanded != url:
-            url = expanded
-
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
-
-    title_tag = soup.find("h1") or soup.find("title")
-    title = title_tag.get_text(strip=True) if title_tag else ""
-
-    def absolutize(src: str) -> str:
-        if src.startswith("http"):
-            return src
-        if src.startswith("//"):
-            return "https:" + src
-        return url.rstrip("/") + "/" + src.lstrip("/")
-
-    # 选取正文容器；若未找到则使用全文
-    content_root = (
-        soup.find("article")
-        or soup.find("main")
-        or soup.select_one("div.article-content, div.entry-content")
-        or soup
-    )
-
-    segments: list[str] = []
-    seen_imgs: set[str] = set()
-
-    for elem in content_root.descendants:
-        if getattr(elem, "name", None) == "p":
-            txt = elem.get_text(" ", strip=True)
-            if txt:
-                segments.append(txt)
-        elif getattr(elem, "name", None) == "img":
-            src = elem.get("src") or elem.get("data-src")
-            if not src or src.endswith(".svg"):
-                continue  # 跳过小图标 / svg
-            abs_src = absolutize(src)
-            if abs_src not in seen_imgs:
-                seen_imgs.add(abs_src)
-                segments.append(abs_src)
-
-    content = " \n".join(segments).strip()
-
-    # Skip pages that are actually Cloudflare/human verification placeholders
-    if not content or "verify you are human" in content.lower():
-        raise ValueError("verification page detected")
-
-    return title, content
-
-
-def crawl(limit: int = 30, out: str = "aiweekly.jsonl") -> None:
-    Path(out).parent.mkdir(parents=True, exist_ok=True)
-
-    home_html = fetch_html(HOME)
-    # # -- DEBUG: 保存首页 HTML 便于排查反爬 --
-    # try:
-    #     Path("debug").mkdir(exist_ok=True)
-    #     Path("debug/debug_home.html").write_text(home_html, encoding="utf-8")
-    # except Exception:
-    #     pass  # 调试辅助，失败可忽略
-
-    latest_issue_url = find_latest_issue_url(home_html)
-    issue_html = fetch_html(latest_issue_url)
-
-    # # -- DEBUG: 保存期刊页面 HTML --
-    # try:
-    #     Path("debug/debug_issue.html").write_text(issue_html, encoding="utf-8")
-    # except Exception:
-    #     pass
-
-    issue_date, article_urls = parse_issue(issue_html)
-    urls = article_urls[:limit]
-
-    saved = 0
-    with open(out, "w", encoding="utf-8") as fp:
-        for url in tqdm(urls, desc="Crawling"):
-            success = False
-            for attempt in range(3):
-                try:
-                    title, content = extract_article(url)
-                    success = True
-                    break
-                except Exception as exc:
-                    if attempt == 2:
-                        print(f"[warn] skip {url}: {exc}")
-                    else:
-                        time.sleep(2)  # brief pause before retry
-            if not success:
-                continue
-
-            record = {"url": url, "title": title, "date": issue_date, "content": content}
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
-            saved += 1
-            time.sleep(random.uniform(1, 2))
-
-    print(f"Saved {saved} / {len(urls)} articles into {out}")
-
-
-if __name__ == "__main__":
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Crawl the latest AI Weekly issue")
-    parser.add_argument("--limit", type=int, default=30, help="Max articles to crawl")
-    parser.add_argument("--out", default="data/aiweekly.jsonl", help="Output JSONL path")
-    args = parser.parse_args()
-
-    crawl(args.limit, args.out)
+"""Crawl latest AI Weekly issue (https://aiweekly.co/) and save external article titles + contents.
+
+Usage:
+    python crawl_aiweekly_api.py --limit 20 --out data/aiweekly.jsonl
+
+The script performs:
+1. Fetch https://aiweekly.co/ home page to locate the first /issues/<id> link (assumed newest issue).
+2. Parse that issue page to get publication date and all external article URLs.
+3. Visit each external link (up to --limit) and extract title + textual content.
+4. Write JSON Lines with fields: url, title, date, content.
+"""
+from __future__ import annotations
+
+import atexit
+import io
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
+from lxml.cssselect import CSSSelector
+from tqdm import tqdm
+import logging
+
+# 允许以 `python AI_Weekly/crawl_aiweekly_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import HostRateLimiter, dumps_line, fromstring, make_session
+
+# optional anti-bot helpers
+try:
+    import cloudscraper  # type: ignore
+except ImportError:
+    cloudscraper = None  # noqa: N816
+
+# optional: C-accelerated JSON decode for embedded state blobs
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # noqa: N816
+
+# Playwright is heavy; load lazily only if installed
+try:
+    from playwright.sync_api import sync_playwright  # type: ignore
+except ImportError:
+    sync_playwright = None  # noqa: N816
+
+
+BASE = "https://aiweekly.co"
+HOME = BASE + "/"
+HEADERS = {
+    "User-Agent": "aiweekly-crawler/0.1 (+https://github.com/)",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+MAX_WORKERS = 8  # 外链文章并发上限（I/O 等待期间释放 GIL，线程池即可近线性加速）
+
+# 预编译热路径上的正则 / CSS 选择器，避免每次调用重复编译
+_ISSUE_HREF_RE = re.compile(r"/issues/\d+")
+_DATE_RE = re.compile(r"([A-Z][a-z]+\s+\d{1,2}(?:st|nd|rd|th)?\s+\d{4})")
+_CATEGORY_SEL = CSSSelector("section.category")
+_CONTENT_SEL = CSSSelector("div.article-content, div.entry-content")
+_INITIAL_STATE_RE = re.compile(r"window\.__INITIAL_STATE__\s*=\s*(\{.*?\})\s*;", re.S)
+
+session = make_session(HEADERS)
+# 外链文章分散在各家站点，按主机 2 req/s 限速即可保持礼貌又不拖慢整轮
+_limiter = HostRateLimiter(2.0)
+
+# Chromium 冷启动要 1-3s：浏览器按线程惰性启动一次并整轮复用（sync API 绑定
+# 创建线程，不能跨线程共享），每次抓取只新开 context/page
+_pw_local = threading.local()
+_pw_instances: list = []
+_pw_lock = threading.Lock()
+
+
+def _get_browser():
+    if getattr(_pw_local, "browser", None) is None:
+        pw = sync_playwright().start()
+        if not pw.chromium.executable_path:
+            pw.stop()
+            raise RuntimeError("Chromium browser not installed for Playwright; run `playwright install chromium`")
+        browser = pw.chromium.launch(headless=True)
+        _pw_local.browser = browser
+        with _pw_lock:
+            _pw_instances.append((pw, browser))
+    return _pw_local.browser
+
+
+@atexit.register
+def _close_browsers() -> None:
+    for pw, browser in _pw_instances:
+        try:
+            browser.close()
+            pw.stop()
+        except Exception:
+            pass
+
+
+def fetch_html(url: str, timeout: int = 30) -> str | bytes:
+    """Return HTML with progressive fallbacks: requests → cloudscraper → Playwright.
+
+    1. Standard requests (fast)
+    2. cloudscraper for Cloudflare JS challenge (if installed)
+    3. Playwright headless browser (if installed)
+
+    成功时直接返回原始字节（lxml 自行解码），省去整段 resp.text 解码 +
+    lower() 拷贝；人机验证只扫描前 4KB。
+    """
+
+    # ---------------- requests ----------------
+    failed_html: bytes | None = None
+    try:
+        resp = session.get(url, timeout=timeout)
+        if resp.status_code == 200 and b"verify you are human" not in resp.content[:4096].lower():
+            enc = (resp.encoding or "").lower()
+            # requests 对无 charset 的 text/html 默认 ISO-8859-1，视同未声明
+            if enc and enc not in ("utf-8", "utf8", "iso-8859-1"):
+                return resp.text
+            return resp.content
+        failed_html = resp.content
+        logging.warning("[fetch_html] requests blocked (%s)", resp.status_code)
+    except Exception as exc:
+        logging.warning("[fetch_html] requests error: %s", exc)
+
+    return _fetch_html_fallback(url, timeout, failed_html)
+
+
+def _find_article_fields(root) -> tuple[str, str]:
+    """迭代 DFS 找同时带 title 与正文字段的节点，返回 (title, body)。"""
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            title = obj.get("title")
+            body = obj.get("content") or obj.get("body") or obj.get("html")
+            if isinstance(title, str) and isinstance(body, str) and body:
+                return title, body
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+    return "", ""
+
+
+def _try_api_fallback(html: str | bytes) -> Optional[str]:
+    """JS 渲染的站点常把数据内嵌在 __NEXT_DATA__ / __INITIAL_STATE__ JSON 里；
+    直接抽出正文并合成 HTML，免去 Playwright 渲染（百毫秒 vs 数秒）。"""
+    try:
+        tree = fromstring(html)
+    except Exception:
+        return None
+
+    raws = [s.text for s in tree.xpath("//script[@id='__NEXT_DATA__']") if s.text]
+    if not raws:
+        for s in tree.xpath("//script[not(@src)]"):
+            m = _INITIAL_STATE_RE.search(s.text or "")
+            if m:
+                raws.append(m.group(1))
+                break
+
+    for raw in raws:
+        try:
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except Exception:
+            continue
+        title, body = _find_article_fields(data)
+        if body:
+            return f"<html><body><h1>{title}</h1><article>{body}</article></body></html>"
+    return None
+
+
+def _fetch_html_fallback(url: str, timeout: int = 30, failed_html: str | bytes | None = None) -> str | bytes:
+    """内嵌 JSON → cloudscraper → Playwright 兜底链（requests 已失败/被拦截时调用）。"""
+
+    # ---------------- 内嵌 JSON（免浏览器） ----------------
+    if failed_html is not None:
+        synthetic = _try_api_fallback(failed_html)
+        if synthetic is not None:
+            return synthetic
+
+    # ---------------- cloudscraper ----------------
+    if cloudscraper is not None:
+        try:
+            scraper = cloudscraper.create_scraper(
+                browser={"custom": "firefox"}, delay=10
+            )
+            resp = scraper.get(url, headers=HEADERS, timeout=timeout)
+            if resp.status_code == 200:
+                return resp.content
+            logging.warning("[fetch_html] cloudscraper blocked (%s)", resp.status_code)
+        except Exception as exc:
+            logging.warning("[fetch_html] cloudscraper error: %s", exc)
+
+    # ---------------- Playwright ----------------
+    if sync_playwright is None:
+        raise RuntimeError(
+            "All fetch methods failed and Playwright not installed; cannot bypass protection"
+        )
+
+    try:
+        ctx = _get_browser().new_context()
+        try:
+            page = ctx.new_page()
+            page.set_default_navigation_timeout(timeout * 1000)
+            page.goto(url, wait_until="domcontentloaded")
+            html = page.content()
+        finally:
+            ctx.close()
+        return html
+    except Exception as exc:
+        raise RuntimeError(f"Playwright failed to fetch {url}: {exc}") from exc
+
+
+def find_latest_issue_url(home_html: str | bytes) -> str:
+    """Return newest issue URL.
+
+    Strategy:
+    1. Scan homepage for any <a> that contains '/issues/<number>'. Accept absolute or relative links.
+    2. If not found, fetch '/issues' archive page and take the first issue link.
+    """
+    tree = fromstring(home_html)
+
+    # 1) direct search on home page
+    for a in tree.xpath("//a[@href]"):
+        href = a.get("href").split("?", 1)[0]
+        if _ISSUE_HREF_RE.search(href):
+            if not href.startswith("http"):
+                href = BASE + href
+            return href.rstrip("/")
+
+    # 2) fallback: visit /issues page (issue archive)
+    try:
+        archive_html = fetch_html(BASE + "/issues")
+        tree = fromstring(archive_html)
+        for a in tree.xpath("//a[@href]"):
+            href = a.get("href").split("?", 1)[0]
+            if _ISSUE_HREF_RE.search(href):
+                if not href.startswith("http"):
+                    href = BASE + href
+                return href.rstrip("/")
+    except Exception as exc:
+        print(f"[warn] failed to fetch /issues archive: {exc}")
+
+    raise RuntimeError("Latest issue link not found on aiweekly.co")
+
+
+def parse_issue(issue_html: str | bytes) -> tuple[str, List[str]]:
+    """Parse issue page and return (date, list_of_external_urls)."""
+    tree = fromstring(issue_html)
+
+    # Date extraction
+    date_txt = ""
+    time_tags = tree.xpath("//time")
+    if time_tags and time_tags[0].text_content().strip():
+        date_txt = time_tags[0].text_content().strip()
+    else:
+        # 日期都写在页眉附近，先只物化前几个 header/h1/h2 的文本给正则扫
+        header_text = " ".join(tree.xpath("(//header | //h1 | //h2)[position() <= 5]//text()"))
+        m = _DATE_RE.search(header_text) or _DATE_RE.search(" ".join(tree.itertext()))
+        if m:
+            date_txt = m.group(1)
+
+    # Collect external links
+    links: list[str] = []
+    seen: set[str] = set()
+
+    # iterate through category sections; skip sponsor/powered-by/footer ads
+    for section in _CATEGORY_SEL(tree):
+        cls = (section.get("class") or "").split()
+        if any(c in {"cc-powered-by", "cc-sponsorfooter"} for c in cls):
+            continue  # skip advertisement blocks
+
+        for a in section.xpath(".//a[@href]"):
+            href = a.get("href").strip()
+            # Skip internal links
+            if href.startswith("/") or "aiweekly.co" in href:
+                continue
+
+            # Normalize by去掉查询串和末尾斜杠，避免 sponsor 短链重复
+            href_norm = href.split("?", 1)[0].rstrip("/")
+
+            if href_norm in seen:
+                continue
+
+            seen.add(href_norm)
+            links.append(href)
+    return date_txt, links
+
+
+def fetch_article(url: str, timeout: int = 30) -> tuple[str, Optional[str | bytes]]:
+    """Fetch one article, returning (final_url, html).
+
+    requests follows cur.at tracking redirects automatically (resp.url is the
+    destination). On failure or bot challenge, fall back to the
+    cloudscraper→Playwright chain.
+    """
+    failed_html: bytes | None = None
+    try:
+        _limiter.wait(url)
+        resp = session.get(url, timeout=timeout)
+        # 原始字节直接交给 lxml，人机验证只扫描前 4KB
+        if resp.status_code == 200 and b"verify you are human" not in resp.content[:4096].lower():
+            enc = (resp.encoding or "").lower()
+            # requests 对无 charset 的 text/html 默认 ISO-8859-1，视同未声明
+            if enc and enc not in ("utf-8", "utf8", "iso-8859-1"):
+                return resp.url, resp.text
+            return resp.url, resp.content
+        failed_html = resp.content
+        logging.warning("[fetch_article] requests blocked (%s) for %s", resp.status_code, url)
+        url = resp.url or url  # 重定向已解析，兜底链直接打最终地址
+    except Exception as exc:
+        logging.warning("[fetch_article] requests failed for %s: %s", url, exc)
+
+    try:
+        return url, _fetch_html_fallback(url, timeout, failed_html)
+    except Exception as exc:
+        print(f"[warn] skip {url}: {exc}")
+        return url, None
+
+
+def fetch_articles(urls: List[str], max_workers: int = MAX_WORKERS) -> List[tuple[str, Optional[str | bytes]]]:
+    """线程池并发抓取外链文章，返回与 urls 对齐的 (final_url, html) 列表。"""
+    results: list[tuple[str, Optional[str | bytes]]] = [("", None)] * len(urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {ex.submit(fetch_article, u): i for i, u in enumerate(urls)}
+        for fut in tqdm(as_completed(futures), total=len(urls), desc="Crawling"):
+            results[futures[fut]] = fut.result()
+    return results
+
+
+def extract_article(url: str, html: str | bytes) -> tuple[str, str]:
+    """Generic article extractor returning (title, content)."""
+    tree = fromstring(html)
+
+    title_tags = tree.xpath("//h1") or tree.xpath("//title")
+    title = title_tags[0].text_content().strip() if title_tags else ""
+
+    def absolutize(src: str) -> str:
+        if src.startswith("http"):
+            return src
+        if src.startswith("//"):
+            return "https:" + src
+        return url.rstrip("/") + "/" + src.lstrip("/")
+
+    # 选取正文容器；若未找到则使用全文
+    content_root = (
+        tree.xpath("//article")
+        or tree.xpath("//main")
+        or _CONTENT_SEL(tree)
+        or [tree]
+    )[0]
+
+    # StringIO 增量写入，避免 list + join 在长文上的二次整串拷贝
+    buf = io.StringIO()
+    write = buf.write
+    seen_imgs: set[str] = set()
+
+    # 单次 XPath 联合查询，按文档序取回 p/img，跳过其余节点的 Python 级遍历
+    for elem in content_root.xpath(".//p | .//img"):
+        if elem.tag == "p":
+            txt = " ".join(elem.text_content().split())
+            if txt:
+                write(txt)
+                write(" \n")
+        elif elem.tag == "img":
+            src = elem.get("src") or elem.get("data-src")
+            if not src or src.endswith(".svg"):
+                continue  # 跳过小图标 / svg
+            abs_src = absolutize(src)
+            if abs_src not in seen_imgs:
+                seen_imgs.add(abs_src)
+                write(abs_src)
+                write(" \n")
+
+    content = buf.getvalue().strip()
+
+    # Skip pages that are actually Cloudflare/human verification placeholders
+    if not content or "verify you are human" in content.lower():
+        raise ValueError("verification page detected")
+
+    return title, content
+
+
+def crawl(limit: int = 30, out: str = "aiweekly.jsonl") -> None:
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+
+    home_html = fetch_html(HOME)
+    # # -- DEBUG: 保存首页 HTML 便于排查反爬 --
+    # try:
+    #     Path("debug").mkdir(exist_ok=True)
+    #     Path("debug/debug_home.html").write_text(home_html, encoding="utf-8")
+    # except Exception:
+    #     pass  # 调试辅助，失败可忽略
+
+    latest_issue_url = find_latest_issue_url(home_html)
+    issue_html = fetch_html(latest_issue_url)
+
+    # # -- DEBUG: 保存期刊页面 HTML --
+    # try:
+    #     Path("debug/debug_issue.html").write_text(issue_html, encoding="utf-8")
+    # except Exception:
+    #     pass
+
+    issue_date, article_urls = parse_issue(issue_html)
+    urls = article_urls[:limit]
+    results = fetch_articles(urls)
+
+    saved = 0
+    # 1 MB 写缓冲：逐行 write 先进内存，满块才落一次 syscall
+    with open(out, "wb", buffering=1 << 20) as fp:
+        for final_url, html in results:
+            if html is None:
+                continue
+            try:
+                title, content = extract_article(final_url, html)
+            except Exception as exc:
+                print(f"[warn] skip {final_url}: {exc}")
+                continue
+
+            record = {"url": final_url, "title": title, "date": issue_date, "content": content}
+            fp.write(dumps_line(record))
+            saved += 1
+
+    print(f"Saved {saved} / {len(urls)} articles into {out}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl the latest AI Weekly issue")
+    parser.add_argument("--limit", type=int, default=30, help="Max articles to crawl")
+    parser.add_argument("--out", default="data/aiweekly.jsonl", help="Output JSONL path")
+    parser.add_argument("--no-cache", action="store_true", help="disable on-disk HTTP cache")
+    args = parser.parse_args()
+
+    if not args.no_cache:
+        # 调试重跑时一小时内命中磁盘缓存（未安装 requests-cache 则原样直连）
+        session = make_session(HEADERS, use_cache=True)
+
+    crawl(args.limit, args.out)
@@ -7,106 +7,117 @@ URL: https://huggingface.co/blog
 """
 from __future__ import annotations
 
-import json
-import random
-import time
+import asyncio
+import io
+import sys
 from pathlib import Path
 from typing import List
 
-import requests
-from requests.adapters import HTTPAdapter, Retry
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+from lxml.cssselect import CSSSelector
+
+# 允许以 `python Huggingface_Blog/crawl_hfb_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import dumps_line, fetch_all, fetch_html, fromstring, make_session
+
+# optional: lexbor C 解析器，列表页是规整的 CMS 输出，解析比 lxml 快一个量级
+try:
+    from selectolax.lexbor import LexborHTMLParser  # type: ignore
+except ImportError:
+    LexborHTMLParser = None  # noqa: N816
 
 BASE = "https://huggingface.co"
 LIST_URL = f"{BASE}/blog"
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Encoding": "gzip, deflate, br",
+}
 
-# session with retry
-session = requests.Session()
-retry_cfg = Retry(total=5, backoff_factor=1, status_forcelist=[429, 502, 503, 504])
-session.mount("https://", HTTPAdapter(max_retries=retry_cfg))
+# 预编译热路径上的 CSS 选择器，避免每次调用重复编译
+_THUMB_SEL = CSSSelector("div[data-target='BlogThumbnail']")
+_BLOG_LINK_SEL = CSSSelector("a[href^='/blog/']")
+_CONTENT_SELS = [
+    CSSSelector("div.markdown"),
+    CSSSelector("div[data-target='MarkdownRenderer']"),
+    CSSSelector("div.prose"),
+    CSSSelector("main div"),
+]
 
-
-def fetch_html(url: str, timeout: int = 30) -> str:
-    for i in range(3):  # extra retries for connection issues
-        try:
-            r = session.get(url, headers=HEADERS, timeout=timeout)
-            r.raise_for_status()
-            return r.text
-        except Exception as e:
-            if i == 2:
-                raise
-            print(f"Retry {i+1}/3 for {url}: {e}")
-            time.sleep(2)
+session = make_session(HEADERS)
 
 
 def parse_list(html: str) -> List[str]:
     """解析博客首页Card，只返回主页卡片里的文章链接，按页面顺序。"""
-    soup = BeautifulSoup(html, "lxml")
-
     links: list[str] = []
     seen: set[str] = set()
 
-    # 1) 优先从首页 BlogThumbnail 卡片结构提取
-    for thumb in soup.select("div[data-target='BlogThumbnail']"):
-        a = thumb.find("a", href=True)
-        if not a:
-            continue
-        href = a["href"].split("?", 1)[0].split("#", 1)[0]
+    def add(href: str) -> None:
+        href = href.split("?", 1)[0].split("#", 1)[0]
         if href.rstrip("/") == "/blog":
-            continue
-        if href not in seen and href.startswith("/blog/"):
+            return
+        if href.startswith("/blog/") and href not in seen:
             links.append(href)
             seen.add(href)
 
-    # 2) fallback：任何指向 /blog/xxx 的链接
-    if not links:
-        for a in soup.select("a[href^='/blog/']"):
-            href = a["href"].split("?", 1)[0].split("#", 1)[0]
-            if href.rstrip("/") == "/blog":
-                continue
-            if href not in seen:
-                links.append(href)
-                seen.add(href)
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        # 1) 优先从首页 BlogThumbnail 卡片结构提取
+        for thumb in tree.css("div[data-target='BlogThumbnail']"):
+            a = thumb.css_first("a[href]")
+            if a is not None:
+                add(a.attributes.get("href") or "")
+        # 2) fallback：任何指向 /blog/xxx 的链接
+        if not links:
+            for a in tree.css("a[href^='/blog/']"):
+                add(a.attributes.get("href") or "")
+    else:
+        tree = fromstring(html)
+        for thumb in _THUMB_SEL(tree):
+            a_tags = thumb.xpath(".//a[@href]")
+            if a_tags:
+                add(a_tags[0].get("href"))
+        if not links:
+            for a in _BLOG_LINK_SEL(tree):
+                add(a.get("href"))
 
     return [BASE + path for path in links]
 
 
-def fetch_detail(url: str) -> tuple[str, str]:
+def parse_detail(html: bytes | str) -> tuple[str, str]:
     """返回 (title, content)"""
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
+    tree = fromstring(html)
 
-    title_tag = soup.find("h1")
-    title = title_tag.get_text(strip=True) if title_tag else ""
+    title_tags = tree.xpath("//h1")
+    title = title_tags[0].text_content().strip() if title_tags else ""
 
     # 各种正文容器：article、div.markdown、div[data-target="MarkdownRenderer"], div.prose, main > div 等
-    content_tag = (
-        soup.find("article")
-        or soup.find("div", class_="markdown")
-        or soup.find("div", attrs={"data-target": "MarkdownRenderer"})
-        or soup.find("div", class_="prose")
-        or soup.select_one("main div")
-    )
+    content_tags = tree.xpath("//article")
+    for sel in _CONTENT_SELS:
+        if content_tags:
+            break
+        content_tags = sel(tree)
 
     def absolutize(src: str) -> str:
         return src if src.startswith("http") else BASE + src
 
-    if content_tag:
-        segments: list[str] = []
-        for elem in content_tag.descendants:
+    if content_tags:
+        # StringIO 增量写入，避免 list + join 在长文上的二次整串拷贝
+        buf = io.StringIO()
+        write = buf.write
+        # 单次 XPath 联合查询，按文档序取回 p/img，跳过其余节点的 Python 级遍历
+        for elem in content_tags[0].xpath(".//p | .//img"):
             # 图片
-            if getattr(elem, "name", None) == "img":
+            if elem.tag == "img":
                 src = elem.get("src") or elem.get("data-src") or elem.get("data-original")
                 if src:
-                    segments.append(absolutize(src))
+                    write(absolutize(src))
+                    write("\n")
             # 段落/文本
-            elif getattr(elem, "name", None) == "p":
-                txt = elem.get_text(" ", strip=True)
+            elif elem.tag == "p":
+                txt = " ".join(elem.text_content().split())
                 if txt:
-                    segments.append(txt)
-        content = "\n".join(segments).strip()
+                    write(txt)
+                    write("\n")
+        content = buf.getvalue().strip()
     else:
         content = ""
 
@@ -116,7 +127,7 @@ def fetch_detail(url: str) -> tuple[str, str]:
 def crawl(limit: int = 30, out: str = "hf_papers.jsonl") -> None:
     Path(out).parent.mkdir(parents=True, exist_ok=True)
 
-    list_html = fetch_html(LIST_URL)
+    list_html = fetch_html(LIST_URL, session)
 
     # # -- debug: 保存首页 HTML --
     # try:
@@ -126,14 +137,19 @@ def crawl(limit: int = 30, out: str = "hf_papers.jsonl") -> None:
     #     print(f"[warn] failed to save debug html: {e}")
 
     urls = parse_list(list_html)[:limit]
+    pages = asyncio.run(fetch_all(urls, headers=HEADERS))
 
-    with open(out, "w", encoding="utf-8") as fp:
-        for url in tqdm(urls, desc="Crawling"):
-            title, content = fetch_detail(url)
+    saved = 0
+    # 1 MB 写缓冲：逐行 write 先进内存，满块才落一次 syscall
+    with open(out, "wb", buffering=1 << 20) as fp:
+        for url, html in zip(urls, pages):
+            if html is None:
+                continue
+            title, content = parse_detail(html)
             record = {"url": url, "title": title, "content": content}
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
-            time.sleep(random.uniform(1, 2))
-    print(f"Saved {len(urls)} posts into {out}")
+            fp.write(dumps_line(record))
+            saved += 1
+    print(f"Saved {saved} / {len(urls)} posts into {out}")
 
 
 if __name__ == "__main__":
@@ -142,6 +158,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Crawl HuggingFace papers trending")
     parser.add_argument("--limit", type=int, default=30, help="Number of papers")
     parser.add_argument("--out", default="data/hf_papers.jsonl", help="Output file")
+    parser.add_argument("--no-cache", action="store_true", help="disable on-disk HTTP cache")
     args = parser.parse_args()
 
+    if not args.no_cache:
+        # 调试重跑时一小时内命中磁盘缓存（未安装 requests-cache 则原样直连）
+        session = make_session(HEADERS, use_cache=True)
+
     crawl(args.limit, args.out)
@@ -7,112 +7,125 @@ URL: https://huggingface.co/blog
 """
 from __future__ import annotations
 
+import asyncio
 import json
-import random
-import time
+import re
+import sys
 from pathlib import Path
 from typing import List
 
-import requests
-from requests.adapters import HTTPAdapter, Retry
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+from lxml.cssselect import CSSSelector
+
+# 允许以 `python Huggingface_trending_paper/crawl_hf_paper_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import dumps_line, fetch_all, fetch_html, fromstring, make_session
+
+# optional: lexbor C 解析器，列表页是规整的 CMS 输出，解析比 lxml 快一个量级
+try:
+    from selectolax.lexbor import LexborHTMLParser  # type: ignore
+except ImportError:
+    LexborHTMLParser = None  # noqa: N816
+
+# optional: C-accelerated JSON decode for the __NEXT_DATA__ blob
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # noqa: N816
 
 BASE = "https://huggingface.co"
 # Trending papers 列表页
 LIST_URL = f"{BASE}/papers/trending"
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
-
-# session with retry
-session = requests.Session()
-retry_cfg = Retry(total=5, backoff_factor=1, status_forcelist=[429, 502, 503, 504])
-session.mount("https://", HTTPAdapter(max_retries=retry_cfg))
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    # 显式声明压缩编码：HTML 传输体积约 3-5 倍缩减（br 需安装 brotli）
+    "Accept-Encoding": "gzip, deflate, br",
+}
 
+# 预编译热路径上的正则 / CSS 选择器，避免每次调用重复编译
+_ABS_H2_RE = re.compile(r"^\s*Abstract\s*$", re.I)
+_PAPER_LINK_SEL = CSSSelector("a[href^='/papers/']")
+_ABSTRACT_SEL = CSSSelector("div.paper-details__abstract")
 
-def fetch_html(url: str, timeout: int = 30) -> str:
-    for i in range(3):  # extra retries for connection issues
-        try:
-            r = session.get(url, headers=HEADERS, timeout=timeout)
-            r.raise_for_status()
-            return r.text
-        except Exception as e:
-            if i == 2:
-                raise
-            print(f"Retry {i+1}/3 for {url}: {e}")
-            time.sleep(2)
+session = make_session(HEADERS)
 
 
 def parse_list(html: str) -> List[str]:
     """解析 Trending Papers 页面，返回论文详情页完整 URL 按页面顺序。"""
-    soup = BeautifulSoup(html, "lxml")
-
     links: list[str] = []
     seen: set[str] = set()
 
-    # 1) 尝试 card <article> 结构
-    for art in soup.select("article"):
-        a_tag = art.find("a", href=True)
-        if not a_tag:
-            continue
-        href = a_tag["href"].split("?", 1)[0].split("#", 1)[0]
+    def add(href: str) -> None:
+        href = href.split("?", 1)[0].split("#", 1)[0]
         if href.startswith("/papers/") and href not in seen:
             links.append(BASE + href)
             seen.add(href)
 
-    # 2) 若仍为空，fallback 任意 <a href="/papers/...">
-    if not links:
-        for a_tag in soup.select("a[href^='/papers/']"):
-            href = a_tag["href"].split("?", 1)[0].split("#", 1)[0]
-            if href not in seen:
-                links.append(BASE + href)
-                seen.add(href)
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        # 1) 尝试 card <article> 结构
+        for art in tree.css("article"):
+            a = art.css_first("a[href]")
+            if a is not None:
+                add(a.attributes.get("href") or "")
+        # 2) 若仍为空，fallback 任意 <a href="/papers/...">
+        if not links:
+            for a in tree.css("a[href^='/papers/']"):
+                add(a.attributes.get("href") or "")
+    else:
+        tree = fromstring(html)
+        for art in tree.xpath("//article"):
+            a_tags = art.xpath(".//a[@href]")
+            if a_tags:
+                add(a_tags[0].get("href"))
+        if not links:
+            for a_tag in _PAPER_LINK_SEL(tree):
+                add(a_tag.get("href"))
 
     return links
 
 
-def fetch_detail(url: str) -> tuple[str, str]:
+def parse_detail(html: bytes | str) -> tuple[str, str]:
     """返回 (title, context=abstract)"""
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
+    tree = fromstring(html)
 
-    title_tag = soup.find("h1")
-    title = title_tag.get_text(strip=True) if title_tag else ""
+    title_tags = tree.xpath("//h1")
+    title = title_tags[0].text_content().strip() if title_tags else ""
 
     # 论文摘要位于 div.paper-details__abstract
-    content_tag = soup.select_one("div.paper-details__abstract")
+    content_tags = _ABSTRACT_SEL(tree)
 
     def absolutize(src: str) -> str:
         return src if src.startswith("http") else BASE + src
 
     context = ""
-    if content_tag:
+    if content_tags:
         segments: list[str] = []
-        for p in content_tag.find_all("p"):
-            txt = p.get_text(" ", strip=True)
+        for p in content_tags[0].xpath(".//p"):
+            txt = " ".join(p.text_content().split())
             if txt:
                 segments.append(txt)
         context = "\n".join(segments).strip()
 
     # fallback: 从 __NEXT_DATA__ 中抽取摘要
     if not context:
-        script_tag = soup.find("script", id="__NEXT_DATA__")
-        if script_tag and script_tag.string:
+        script_tags = tree.xpath("//script[@id='__NEXT_DATA__']")
+        if script_tags and script_tags[0].text:
             try:
-                import json as _json
-                nxt = _json.loads(script_tag.string)
-                def find_abstract(obj):
-                    if isinstance(obj, dict):
-                        if "abstract" in obj and isinstance(obj["abstract"], str):
-                            return obj["abstract"]
-                        for v in obj.values():
-                            res = find_abstract(v)
-                            if res:
-                                return res
-                    elif isinstance(obj, list):
-                        for v in obj:
-                            res = find_abstract(v)
-                            if res:
-                                return res
+                raw = script_tags[0].text
+                nxt = orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+                def find_abstract(root) -> str:
+                    # 迭代 DFS：命中即返回，避免递归深度限制与命中后的冗余遍历
+                    stack = [root]
+                    while stack:
+                        obj = stack.pop()
+                        if isinstance(obj, dict):
+                            a = obj.get("abstract")
+                            if isinstance(a, str) and a:
+                                return a
+                            stack.extend(obj.values())
+                        elif isinstance(obj, list):
+                            stack.extend(obj)
                     return ""
 
                 abstract = find_abstract(nxt)
@@ -122,14 +135,15 @@ def fetch_detail(url: str) -> tuple[str, str]:
 
     # 再次 fallback：根据 "Abstract" 标题定位
     if not context:
-        import re
-        h2_abs = soup.find("h2", string=re.compile(r"^\s*Abstract\s*$", re.I))
-        if h2_abs:
+        for h2 in tree.xpath("//h2"):
+            if not _ABS_H2_RE.match(h2.text_content()):
+                continue
             # 容器在父 div 内，找所有段落
-            parent = h2_abs.find_parent()
-            if parent:
-                paras = [p.get_text(" ", strip=True) for p in parent.find_all("p") if p.get_text(strip=True)]
+            parent = h2.getparent()
+            if parent is not None:
+                paras = [" ".join(p.text_content().split()) for p in parent.xpath(".//p") if p.text_content().strip()]
                 context = "\n".join(paras).strip()
+            break
 
     return title, context
 
@@ -137,7 +151,7 @@ def fetch_detail(url: str) -> tuple[str, str]:
 def crawl(limit: int = 30, out: str = "hf_papers.jsonl") -> None:
     Path(out).parent.mkdir(parents=True, exist_ok=True)
 
-    list_html = fetch_html(LIST_URL)
+    list_html = fetch_html(LIST_URL, session)
 
     # # -- debug: 保存首页 HTML --
     # try:
@@ -147,23 +161,28 @@ def crawl(limit: int = 30, out: str = "hf_papers.jsonl") -> None:
     #     print(f"[warn] failed to save debug html: {e}")
 
     urls = parse_list(list_html)[:limit]
-
-    with open(out, "w", encoding="utf-8") as fp:
-        for url in tqdm(urls, desc="Crawling"):
-            title, context = fetch_detail(url)
+    pages = asyncio.run(fetch_all(urls, headers=HEADERS))
+
+    saved = 0
+    # 1 MB 写缓冲：逐行 write 先进内存，满块才落一次 syscall
+    with open(out, "wb", buffering=1 << 20) as fp:
+        for url, html in zip(urls, pages):
+            if html is None:
+                continue
+            title, context = parse_detail(html)
             # if not context:
             #     # 保存空摘要页面供调试
             #     try:
             #         Path("debug/empty").mkdir(parents=True, exist_ok=True)
             #         fname = url.rstrip("/").split("/")[-1] or "index"
-            #         Path(f"debug/empty/{fname}.html").write_text(fetch_html(url), encoding="utf-8")
+            #         Path(f"debug/empty/{fname}.html").write_text(html, encoding="utf-8")
             #     except Exception as e:
             #         print(f"[warn] failed to save empty page {url}: {e}")
 
             record = {"url": url, "title": title, "context": context}
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
-            time.sleep(random.uniform(1, 2))
-    print(f"Saved {len(urls)} posts into {out}")
+            fp.write(dumps_line(record))
+            saved += 1
+    print(f"Saved {saved} / {len(urls)} posts into {out}")
 
 
 if __name__ == "__main__":
@@ -172,6 +191,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Crawl HuggingFace trending papers")
     parser.add_argument("--limit", type=int, default=30, help="Number of papers")
     parser.add_argument("--out", default="data/hf_papers.jsonl", help="Output file")
+    parser.add_argument("--no-cache", action="store_true", help="disable on-disk HTTP cache")
     args = parser.parse_args()
 
+    if not args.no_cache:
+        # 调试重跑时一小时内命中磁盘缓存（未安装 requests-cache 则原样直连）
+        session = make_session(HEADERS, use_cache=True)
+
     crawl(args.limit, args.out)
@@ -2,75 +2,91 @@
 
 from __future__ import annotations
 
-import json
-import random
-import time
+import asyncio
+import io
+import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import List
 
-import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+from lxml.cssselect import CSSSelector
 from urllib.parse import urljoin
 
+# 允许以 `python Synced_Review/crawl_sync_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import dumps_line, fetch_all, fetch_html, fromstring, make_session
+
+# optional: lexbor C 解析器，列表页是规整的 CMS 输出，解析比 lxml 快一个量级
+try:
+    from selectolax.lexbor import LexborHTMLParser  # type: ignore
+except ImportError:
+    LexborHTMLParser = None  # noqa: N816
+
 
 # ----------------- Config -----------------
 BASE = "https://syncedreview.com"
 LIST_URL = f"{BASE}/"
-HEADERS = {"User-Agent": "synced-crawler/0.1"}
-# ------------------------------------------
+HEADERS = {"User-Agent": "synced-crawler/0.1", "Accept-Encoding": "gzip, deflate, br"}
 
+# 预编译热路径上的 CSS 选择器，避免每次调用重复编译
+_LIST_SEL = CSSSelector("h2.entry-title a[href]")
+_CONTENT_SEL = CSSSelector("div.entry-content")
+_CONTENT_FALLBACK_SEL = CSSSelector("div.article-content")
+# ------------------------------------------
 
-def fetch_html(url: str, timeout: int = 20) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=timeout)
-    r.raise_for_status()
-    return r.text
+session = make_session(HEADERS)
 
 
 def parse_list(html: str) -> List[str]:
-    soup = BeautifulSoup(html, "lxml")
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        hrefs = [a.attributes.get("href") or "" for a in tree.css("h2.entry-title a[href]")]
+    else:
+        tree = fromstring(html)
+        hrefs = [a.get("href") for a in _LIST_SEL(tree)]
+
     links: List[str] = []
-    for h2 in soup.select("h2.entry-title a[href]"):
-        href = h2["href"]
+    for href in hrefs:
         if href.startswith("/"):
             href = urljoin(BASE, href)
         links.append(href)
     return links
 
 
-def fetch_detail(url: str) -> tuple[str, str, str]:
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
+def parse_detail(html: bytes | str) -> tuple[str, str, str]:
+    tree = fromstring(html)
 
-    title_tag = soup.find("h1") or soup.find("title")
-    title = title_tag.get_text(strip=True) if title_tag else ""
+    title_tags = tree.xpath("//h1") or tree.xpath("//title")
+    title = title_tags[0].text_content().strip() if title_tags else ""
 
     date = ""
-    time_tag = soup.find("time")
-    if time_tag and time_tag.has_attr("datetime"):
-        date = time_tag["datetime"][:10]
+    time_tags = tree.xpath("//time[@datetime]")
+    if time_tags:
+        date = time_tags[0].get("datetime")[:10]
 
-    content_node = soup.select_one("div.entry-content") or soup.select_one("div.article-content")
+    content_nodes = _CONTENT_SEL(tree) or _CONTENT_FALLBACK_SEL(tree)
 
     def absolutize(u: str) -> str:
         return u if u.startswith("http") else urljoin(BASE, u)
 
-    def collect_parts(node) -> List[str]:
-        segs: List[str] = []
-        from bs4 import NavigableString, Tag
-        for child in node.descendants:
-            if isinstance(child, Tag) and child.name == "img":
-                src = child.get("src") or child.get("data-src") or child.get("data-original")
-                if src:
-                    segs.append(absolutize(src))
-            elif isinstance(child, NavigableString):
-                text = child.strip()
+    def collect_parts(node) -> str:
+        # StringIO 增量写入，避免 list + join 在长文上的二次整串拷贝
+        buf = io.StringIO()
+        write = buf.write
+        # 单次 XPath 联合查询，按文档序取回文本节点与图片，跳过其余节点的 Python 级遍历
+        for item in node.xpath(".//text() | .//img"):
+            if isinstance(item, str):
+                text = item.strip()
                 if text:
-                    segs.append(text)
-        return segs
+                    write(text)
+                    write("\n")
+            else:
+                src = item.get("src") or item.get("data-src") or item.get("data-original")
+                if src:
+                    write(absolutize(src))
+                    write("\n")
+        return buf.getvalue().rstrip("\n")
 
-    content_list = collect_parts(content_node) if content_node else []
-    content = "\n".join(content_list)
+    content = collect_parts(content_nodes[0]) if content_nodes else ""
 
     return title, date, content
 
@@ -78,21 +94,27 @@ def fetch_detail(url: str) -> tuple[str, str, str]:
 def crawl(limit: int = 20, out: str = "synced.jsonl") -> None:
     Path(out).parent.mkdir(parents=True, exist_ok=True)
 
-    list_html = fetch_html(LIST_URL)
+    list_html = fetch_html(LIST_URL, session, timeout=20)
     urls = parse_list(list_html)[:limit]
-    with open(out, "w", encoding="utf-8") as fp:
-        for url in tqdm(urls, desc="Crawling"):
+    pages = asyncio.run(fetch_all(urls, headers=HEADERS, timeout=20))
+
+    saved = 0
+    # 1 MB 写缓冲：逐行 write 先进内存，满块才落一次 syscall
+    with open(out, "wb", buffering=1 << 20) as fp:
+        for url, html in zip(urls, pages):
+            if html is None:
+                continue
             try:
-                title, date, content = fetch_detail(url)
+                title, date, content = parse_detail(html)
             except Exception as e:
                 print("skip", url, e)
                 continue
 
             record = {"url": url, "title": title, "date": date, "content": content}
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
-            time.sleep(random.uniform(1, 2))
+            fp.write(dumps_line(record))
+            saved += 1
 
-    print(f"Saved {len(urls)} articles into {out}")
+    print(f"Saved {saved} / {len(urls)} articles into {out}")
 
 
 if __name__ == "__main__":
@@ -101,6 +123,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Crawl SyncedReview homepage")
     parser.add_argument("--limit", type=int, default=20, help="articles to crawl")
     parser.add_argument("--out", default="data/synced.jsonl", help="Output file")
+    parser.add_argument("--no-cache", action="store_true", help="disable on-disk HTTP cache")
     args = parser.parse_args()
 
+    if not args.no_cache:
+        # 调试重跑时一小时内命中磁盘缓存（未安装 requests-cache 则原样直连）
+        session = make_session(HEADERS, use_cache=True)
+
     crawl(args.limit, args.out)
@@ -4,48 +4,70 @@ The site renders static HTML (WordPress). Each article link in <article>.
 """
 from __future__ import annotations
 
-import json
-import random
-import time
+import asyncio
+import sys
 from pathlib import Path
 from typing import List
 
-import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+from lxml.cssselect import CSSSelector
+
+# 允许以 `python TechCrunch_AI/crawl_tec_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import dumps_line, fetch_all, fetch_html, fromstring, make_session
+
+# optional: lexbor C 解析器，列表页是规整的 CMS 输出，解析比 lxml 快一个量级
+try:
+    from selectolax.lexbor import LexborHTMLParser  # type: ignore
+except ImportError:
+    LexborHTMLParser = None  # noqa: N816
 
 BASE = "https://techcrunch.com"
 # TechCrunch 人工智能分类页
 LIST_URL = f"{BASE}/category/artificial-intelligence/"
-HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Gecko"}
-
-
-def fetch_html(url: str, timeout: int = 20) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=timeout)
-    r.raise_for_status()
-    return r.text
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Gecko",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+# 预编译热路径上的 CSS 选择器，避免每次调用重复编译
+_LIST_SEL_STRS = [
+    "article a.post-block__title__link",
+    "h2.post-block__title a",
+    "a.loop-card__title-link",
+    "a[data-ga-entry-text]",
+    "div.post-block a.post-block__title__link",
+]
+_LIST_SELS = [CSSSelector(s) for s in _LIST_SEL_STRS]
+_CONTENT_SELS = [
+    CSSSelector("div.article-content"),
+    CSSSelector("div.article__content"),
+    CSSSelector("div.entry-content"),
+]
+
+session = make_session(HEADERS)
 
 
 def parse_list(html: str) -> List[str]:
     """返回分类页所有文章链接（顺序）。"""
-    soup = BeautifulSoup(html, "lxml")
-
     links: list[str] = []
     seen: set[str] = set()
 
-    sel = [
-        "article a.post-block__title__link",
-        "h2.post-block__title a",
-        "a.loop-card__title-link",
-        "a[data-ga-entry-text]",
-    ]
-
-    for css in sel + ["div.post-block a.post-block__title__link"]:
-        for a in soup.select(css):
-            href = a["href"].split("?", 1)[0]
-            if href not in seen:
-                links.append(href)
-                seen.add(href)
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        for sel in _LIST_SEL_STRS:
+            for a in tree.css(sel):
+                href = (a.attributes.get("href") or "").split("?", 1)[0]
+                if href and href not in seen:
+                    links.append(href)
+                    seen.add(href)
+    else:
+        tree = fromstring(html)
+        for sel in _LIST_SELS:
+            for a in sel(tree):
+                href = (a.get("href") or "").split("?", 1)[0]
+                if href and href not in seen:
+                    links.append(href)
+                    seen.add(href)
 
     if not links:
         Path("debug").mkdir(exist_ok=True)
@@ -55,31 +77,30 @@ def parse_list(html: str) -> List[str]:
     return links
 
 
-def fetch_detail(url: str) -> tuple[str, str, str]:
+def parse_detail(html: bytes | str) -> tuple[str, str, str]:
     """Return (title, date, content) for TechCrunch article"""
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
+    tree = fromstring(html)
 
-    title_tag = soup.find("h1")
-    title = title_tag.get_text(strip=True) if title_tag else ""
+    title_tags = tree.xpath("//h1")
+    title = title_tags[0].text_content().strip() if title_tags else ""
 
-    content_node = (
-        soup.select_one("div.article-content")
-        or soup.select_one("div.article__content")
-        or soup.select_one("div.entry-content")
-    )
+    content_nodes = []
+    for sel in _CONTENT_SELS:
+        content_nodes = sel(tree)
+        if content_nodes:
+            break
 
     def collect_paragraphs(node) -> str:
-        pieces = [p.get_text(" ", strip=True) for p in node.find_all("p") if p.get_text(strip=True)]
+        pieces = [" ".join(p.text_content().split()) for p in node.xpath(".//p") if p.text_content().strip()]
         return "\n".join(pieces).strip()
 
-    content = collect_paragraphs(content_node) if content_node else ""
+    content = collect_paragraphs(content_nodes[0]) if content_nodes else ""
 
     # date
     date = ""
-    time_tag = soup.find("time")
-    if time_tag and time_tag.has_attr("datetime"):
-        date = time_tag["datetime"][:10]
+    time_tags = tree.xpath("//time[@datetime]")
+    if time_tags:
+        date = time_tags[0].get("datetime")[:10]
 
     return title, date, content
 
@@ -87,7 +108,7 @@ def fetch_detail(url: str) -> tuple[str, str, str]:
 def crawl(limit: int = 30, out: str = "techcrunch_ai.jsonl") -> None:
     Path(out).parent.mkdir(parents=True, exist_ok=True)
 
-    list_html = fetch_html(LIST_URL)
+    list_html = fetch_html(LIST_URL, session, timeout=20)
 
     # # DEBUG disabled: save homepage html
     # try:
@@ -97,11 +118,16 @@ def crawl(limit: int = 30, out: str = "techcrunch_ai.jsonl") -> None:
     #     pass
 
     urls = parse_list(list_html)[:limit]
+    pages = asyncio.run(fetch_all(urls, headers=HEADERS, timeout=20))
 
-    with open(out, "w", encoding="utf-8") as fp:
-        for url in tqdm(urls, desc="Crawling"):
+    saved = 0
+    # 1 MB 写缓冲：逐行 write 先进内存，满块才落一次 syscall
+    with open(out, "wb", buffering=1 << 20) as fp:
+        for url, html in zip(urls, pages):
+            if html is None:
+                continue
             try:
-                title, date, content = fetch_detail(url)
+                title, date, content = parse_detail(html)
             except Exception as e:
                 print(f"skip {url}: {e}")
                 continue
@@ -111,14 +137,14 @@ def crawl(limit: int = 30, out: str = "techcrunch_ai.jsonl") -> None:
             #     try:
             #         Path("debug/empty").mkdir(parents=True, exist_ok=True)
             #         fname = url.rstrip("/").split("/")[-1] or "index"
-            #         Path(f"debug/empty/{fname}.html").write_text(fetch_html(url), encoding="utf-8")
+            #         Path(f"debug/empty/{fname}.html").write_text(html, encoding="utf-8")
             #     except Exception:
             #         pass
 
             record = {"url": url, "title": title, "date": date, "content": content}
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
-            time.sleep(random.uniform(1, 2))
-    print(f"Saved {len(urls)} articles into {out}")
+            fp.write(dumps_line(record))
+            saved += 1
+    print(f"Saved {saved} / {len(urls)} articles into {out}")
 
 
 if __name__ == "__main__":
@@ -127,6 +153,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Crawl TechCrunch AI category")
     parser.add_argument("--limit", type=int, default=30, help="articles to crawl")
     parser.add_argument("--out", default="data/techcrunch_ai.jsonl", help="output file")
+    parser.add_argument("--no-cache", action="store_true", help="disable on-disk HTTP cache")
     args = parser.parse_args()
 
+    if not args.no_cache:
+        # 调试重跑时一小时内命中磁盘缓存（未安装 requests-cache 则原样直连）
+        session = make_session(HEADERS, use_cache=True)
+
     crawl(args.limit, args.out)
@@ -0,0 +1,206 @@
+"""各站点爬虫共享的辅助模块：连接池 Session、HTML 抓取与 aiohttp 并发下载。
+
+站点脚本以 ``python <站点目录>/crawl_xxx_api.py`` 方式直接运行，因此脚本内先把
+仓库根目录插入 ``sys.path`` 再 ``from common import ...``。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter, Retry
+from tqdm import tqdm
+
+# optional: C-accelerated JSON encode for JSONL output
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # noqa: N816
+
+# optional: 磁盘 HTTP 缓存，调试重跑时窗口内直接命中、免重新下载
+try:
+    from requests_cache import CachedSession  # type: ignore
+except ImportError:
+    CachedSession = None  # noqa: N816
+
+# 并发抓取详情页：信号量限制总并发，connector 限制每主机连接数
+CONCURRENCY = 16
+
+_parsers = threading.local()
+
+
+def _get_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    """每线程复用同一 HTMLParser：省去 libxml2 每次新建 parser 的固定开销，
+    同时避免跨线程共享 parser 状态（libxml2 的 parser 非线程安全）。"""
+    attr = "utf8" if encoding else "default"
+    parser = getattr(_parsers, attr, None)
+    if parser is None:
+        parser = lxml.html.HTMLParser(encoding=encoding)
+        setattr(_parsers, attr, parser)
+    return parser
+
+
+def fromstring(html: bytes | str) -> lxml.html.HtmlElement:
+    """bytes 按 UTF-8 解析（与 aiohttp 的默认解码一致）；str 直接解析。"""
+    if isinstance(html, bytes):
+        return lxml.html.fromstring(html, parser=_get_parser("utf-8"))
+    return lxml.html.fromstring(html, parser=_get_parser(None))
+
+
+class HostRateLimiter:
+    """按主机限速：同主机请求之间保证 1/rps 秒的最小间隔，不同主机互不阻塞。
+
+    取代逐请求 time.sleep(random.uniform(1, 2)) 的粗暴节流——空闲等待只在
+    真正需要礼貌的同主机连发时出现。线程与协程均可安全使用。
+    """
+
+    def __init__(self, rps: float = 2.0, burst: int = 1):
+        self.min_gap = 1.0 / rps
+        self.burst = burst
+        self._next_at: defaultdict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def _reserve(self, host: str) -> float:
+        """原子地预订该主机下一次发车时间，返回调用方需等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            # 令牌桶式突发：闲置期间最多累积 burst 个立即可用的名额
+            at = max(self._next_at[host], now - (self.burst - 1) * self.min_gap)
+            self._next_at[host] = at + self.min_gap
+            return at - now
+
+    def wait(self, url: str) -> None:
+        delay = self._reserve(urlparse(url).netloc)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str) -> None:
+        delay = self._reserve(urlparse(url).netloc)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def dumps_line(record: dict) -> bytes:
+    """序列化一条 JSONL 记录（含换行）；orjson 约快 3-5 倍，未安装退回标准库。"""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# 全部连接共用一个 SSLContext：同主机的后续握手能命中 TLS 会话恢复
+# （省 1 个 RTT），证书链校验结果也随 context 复用；顺带关闭 TLS 压缩
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.options |= ssl.OP_NO_COMPRESSION
+
+
+class _TLSAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = _SSL_CTX
+        return super().init_poolmanager(*args, **kwargs)
+
+
+def make_session(
+    headers: Optional[dict] = None,
+    pool_connections: int = 16,
+    pool_maxsize: int = 32,
+    use_cache: bool = False,
+) -> requests.Session:
+    """返回带重试与 keep-alive 连接池的 requests.Session。
+
+    use_cache=True 且安装了 requests-cache 时改用 sqlite 磁盘缓存会话，
+    一小时内重跑同一页面直接命中本地缓存（调试解析时不再反复下载）。
+    """
+    if use_cache and CachedSession is not None:
+        Path("data").mkdir(exist_ok=True)
+        session = CachedSession(
+            "data/.http_cache.sqlite",
+            expire_after=3600,
+            allowable_methods=("GET", "HEAD"),
+            stale_if_error=True,
+            cache_control=True,  # 尊重站点的 Cache-Control 响应头
+        )
+    else:
+        session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    # respect_retry_after_header：被限流（429/503）时按服务端给的 Retry-After 退避
+    retry_cfg = Retry(
+        total=5,
+        backoff_factor=1,
+        status_forcelist=[429, 502, 503, 504],
+        respect_retry_after_header=True,
+    )
+    session.mount(
+        "https://",
+        _TLSAdapter(max_retries=retry_cfg, pool_connections=pool_connections, pool_maxsize=pool_maxsize),
+    )
+    return session
+
+
+def fetch_html(url: str, session: requests.Session, timeout: int = 30) -> str:
+    for i in range(3):  # extra retries for connection issues
+        try:
+            r = session.get(url, timeout=timeout)
+            r.raise_for_status()
+            return r.text
+        except Exception as e:
+            if i == 2:
+                raise
+            print(f"Retry {i+1}/3 for {url}: {e}")
+            time.sleep(2)
+
+
+async def fetch(session: aiohttp.ClientSession, url: str, timeout: int = 30) -> bytes | str:
+    # 原始字节直接交给 lxml，省去 resp.text() 的整段 str 拷贝；
+    # 仅当响应头声明了非 UTF-8 编码时才在这里解码
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        resp.raise_for_status()
+        body = await resp.read()
+        charset = resp.charset
+    if charset and charset.lower() not in ("utf-8", "utf8"):
+        return body.decode(charset, "replace")
+    return body
+
+
+async def fetch_all(
+    urls: List[str],
+    headers: Optional[dict] = None,
+    concurrency: int = CONCURRENCY,
+    timeout: int = 30,
+    desc: str = "Crawling",
+    limiter: Optional[HostRateLimiter] = None,
+) -> List[Optional[bytes | str]]:
+    """并发抓取所有详情页，返回与 urls 对齐的 HTML 列表（失败为 None）。"""
+    sem = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=8)
+    if limiter is None:
+        limiter = HostRateLimiter(8.0)  # 同主机 8 req/s，站点目录页都来自单一域名
+
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as s:
+        pbar = tqdm(total=len(urls), desc=desc)
+
+        async def bounded(url: str) -> Optional[bytes | str]:
+            async with sem:
+                try:
+                    await limiter.wait_async(url)
+                    return await fetch(s, url, timeout)
+                except Exception as exc:
+                    print(f"[warn] skip {url}: {exc}")
+                    return None
+                finally:
+                    pbar.update(1)
+
+        try:
+            return await asyncio.gather(*(bounded(u) for u in urls))
+        finally:
+            pbar.close()
@@ -2,35 +2,84 @@
 
 from __future__ import annotations
 
+import atexit
 import json
-import random
-import time
+import queue
+import shelve
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 
 import re
-import requests
+import lxml.html
 from bs4 import BeautifulSoup
+from lxml import etree
 from tqdm import tqdm
 
+# 允许以 `python 新智源/crawl_xzy_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import HostRateLimiter, dumps_line, make_session
+
 
 # ----------------- Config -----------------
 BASE = "https://link.baai.ac.cn"
 ACCOUNT = "AI_era"
-HEADERS = {"User-Agent": "baai-crawler/0.2"}
+HEADERS = {"User-Agent": "baai-crawler/0.2", "Accept-Encoding": "gzip, deflate, br"}
 PER_PAGE = 40
 
 # hub article link pattern
 HUB_PATTERN = re.compile(r"https?://hub\.baai\.ac\.cn/view/\d+")
+HUB_BASE = "https://hub.baai.ac.cn"  # 相对图片链接补全前缀
 # ------------------------------------------
 
+# 模块级共享 Session：keep-alive 连接池免去逐请求 TCP+TLS 握手
+SESSION = make_session(HEADERS, pool_connections=10, pool_maxsize=20)
+
+MAX_WORKERS = 6  # hub 文章并发上限
+
+# 按主机限速的令牌桶（突发 4）：取代固定的 random.uniform sleep，
+# 服务器顺畅时跑满配额，被限流（429/503）时由 Session 的 Retry 按 Retry-After 退避
+_limiter = HostRateLimiter(2.0, burst=4)
+
+# 时间线摘要已有这么多字符时视为全文，直接省掉 hub 详情页的整个 HTTP 往返
+HUB_SKIP_TEXT_LEN = 400
+
+# 磁盘缓存：UID 基本不变、hub 文章内容不变，重跑（比如调大 --limit）时直接命中
+UID_CACHE = Path("data/.uid_cache.json")
+_HUB_CACHE_PATH = "data/.hub_cache"
+_hub_cache: Optional[shelve.Shelf] = None
+_hub_lock = threading.Lock()  # shelve 非线程安全，读写都要串行
+
+
+def _open_hub_cache() -> shelve.Shelf:
+    global _hub_cache
+    if _hub_cache is None:
+        # 双重检查：六个 worker 首次调用可能同时到这里，open 必须持锁做，
+        # 否则会出现两个 Shelf 写同一份底层文件（dbm.dumb 无文件锁）
+        with _hub_lock:
+            if _hub_cache is None:
+                Path("data").mkdir(exist_ok=True)
+                _hub_cache = shelve.open(_HUB_CACHE_PATH)
+                atexit.register(_hub_cache.close)
+    return _hub_cache
+
 
 def lookup_uid(acct: str) -> str:
-    resp = requests.get(
-        f"{BASE}/api/v1/accounts/lookup", params={"acct": acct}, headers=HEADERS, timeout=10
-    )
+    try:
+        cached = json.loads(UID_CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cached = {}
+    if acct in cached:
+        return cached[acct]
+    resp = SESSION.get(f"{BASE}/api/v1/accounts/lookup", params={"acct": acct}, timeout=10)
     resp.raise_for_status()
-    return resp.json()["id"]
+    uid = resp.json()["id"]
+    cached[acct] = uid
+    UID_CACHE.parent.mkdir(exist_ok=True)
+    UID_CACHE.write_text(json.dumps(cached), encoding="utf-8")
+    return uid
 
 
 def fetch_statuses(uid: str, max_id: Optional[str] = None) -> List[dict]:
@@ -38,114 +87,175 @@ def fetch_statuses(uid: str, max_id: Optional[str] = None) -> List[dict]:
     if max_id:
         params["max_id"] = max_id
     url = f"{BASE}/api/v1/accounts/{uid}/statuses"
-    r = requests.get(url, params=params, headers=HEADERS, timeout=10)
+    _limiter.wait(url)
+    r = SESSION.get(url, params=params, timeout=10)
     r.raise_for_status()
     return r.json()
 
 
-def fetch_hub_article(url: str) -> tuple[str, str]:
-    r = requests.get(url, headers=HEADERS, timeout=10)
-    r.raise_for_status()
+def _fetch_hub_tree(url: str):
+    """流式下载 + 增量解析 hub 页面。
 
-    # # --- DEBUG: 保存首包 HTML 便于本地查看 ----
-    # try:
-    #     Path("debug").mkdir(exist_ok=True)
-    #     debug_path = Path("debug/debug.html")
-    #     debug_path.write_text(r.text, encoding="utf-8")
-    # except Exception as _:
-    #     pass  # 调试辅助，失败可忽略
+    #js_content 闭合即停止读取剩余字节（评论区、页脚、脚本都不再下载），
+    网络传输与解析重叠进行；页面没有 #js_content 时读完整页返回完整树。
+    """
+    parser = etree.HTMLPullParser(events=("end",))
+    # 让增量解析出的元素带 lxml.html 的 text_content 等便捷方法
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    _limiter.wait(url)
+    with SESSION.get(url, timeout=10, stream=True) as r:
+        r.raise_for_status()
+        for chunk in r.iter_content(65536):
+            parser.feed(chunk)
+            for _event, elem in parser.read_events():
+                if elem.get("id") == "js_content":
+                    # with 块退出时提前关闭连接，未读字节直接丢弃
+                    return elem.getroottree().getroot()
+    return parser.close()
 
-    soup = BeautifulSoup(r.text, "lxml")
 
-    # Title: prefer #post-title then generic <h1>
-    title_tag = soup.select_one("#post-title") or soup.select_one("h1")
-    title = title_tag.get_text(strip=True) if title_tag else ""
+def fetch_hub_article(url: str) -> tuple[str, str]:
+    cache = _open_hub_cache()
+    with _hub_lock:
+        hit = cache.get(url)
+    if hit is not None:
+        return hit
 
-    # Content: inside #js_content (nested html) or .article-content fallback
-    content_node = soup.select_one("#js_content")
-    if not content_node:
-        inner_node = soup.select_one("#post-content html")
-        if inner_node:
-            content_node = BeautifulSoup(str(inner_node), "lxml").select_one("#js_content")
-    if not content_node:
-        content_node = soup.select_one("div.article-content")
+    tree = _fetch_hub_tree(url)
 
-    def absolutize(u: str) -> str:
-        return u if u.startswith("http") else "https://hub.baai.ac.cn" + u
+    # Title: prefer #post-title then generic <h1>
+    title_nodes = tree.xpath("//*[@id='post-title']") or tree.xpath("//h1")
+    title = title_nodes[0].text_content().strip() if title_nodes else ""
+
+    # Content: inside #js_content（原始页面可能嵌套一层 <html>，全局 XPath 都能命中）
+    # or .article-content fallback
+    content_nodes = tree.xpath("//*[@id='js_content']") or tree.xpath("//div[contains(@class, 'article-content')]")
 
     parts = []
-    if content_node:
-        for node in content_node.descendants:
-            if getattr(node, "name", None) == "img":
-                u = node.get("src") or node.get("data-src")
-                if u:
-                    parts.append(absolutize(u))
-            elif isinstance(node, str):
-                txt = node.strip()
+    if content_nodes:
+        # 单次 XPath 联合查询，按文档序取回文本节点与图片，C 层完成整棵树遍历；
+        # 补前缀的判断内联在循环里，省掉逐图片的函数调用
+        for item in content_nodes[0].xpath(".//text() | .//img"):
+            if isinstance(item, str):
+                txt = item.strip()
                 if txt:
                     parts.append(txt)
+            else:
+                u = item.get("src") or item.get("data-src")
+                if u:
+                    parts.append(u if u[:4] == "http" else HUB_BASE + u)
     text = " ".join(parts).strip()
+    with _hub_lock:
+        cache[url] = (title, text)
     return title, text
 
 
-def parse_status(item: dict) -> dict:
+def parse_status_meta(item: dict) -> dict:
+    """解析单条 status 为中间记录（含 hub_link，可能为 None），不做任何网络请求。"""
     raw_html = item["content"]
-    soup = BeautifulSoup(raw_html, "lxml")
-    text_short = soup.get_text(" ", strip=True)
-
-    hub_link: Optional[str] = None
-    # 查找<a href="..."> 指向 hub.baai 的链接
-    for a in soup.find_all("a", href=True):
-        if HUB_PATTERN.match(a["href"]):
-            hub_link = a["href"]
-            break
 
-    hub_match = HUB_PATTERN.search(text_short) if not hub_link else None
-    if hub_match:
-        hub_link = hub_match.group()
-
-    if hub_link:
-        try:
-            title, full_text = fetch_hub_article(hub_link)
-            return {
-                "url": hub_link,
-                "title": title or full_text[:40],
-                "date": item["created_at"],
-                "content": full_text or text_short,
-            }
-        except Exception as err:
-            print("Hub fetch failed", hub_link, err)
+    # 单次正则扫原始 HTML 就能找到 hub 链接（覆盖 href 属性和纯文本两种出现
+    # 形式），省掉原来的逐 <a> 匹配 + 文本二次 search
+    m = HUB_PATTERN.search(raw_html)
+    hub_link: Optional[str] = m.group() if m else None
 
+    text_short = BeautifulSoup(raw_html, "lxml").get_text(" ", strip=True)
     title = text_short[:40] + ("…" if len(text_short) > 40 else "")
     return {
         "url": item["url"],
         "title": title,
         "date": item["created_at"],
         "content": text_short,
+        "hub_link": hub_link,
     }
 
 
+def enrich_with_hub(record: dict) -> dict:
+    """若记录带 hub_link，抓取 hub 文章替换标题/正文；失败保留时间线摘要。"""
+    hub_link = record.pop("hub_link", None)
+    if not hub_link:
+        return record
+    # 摘要足够长时认为时间线已带全文（只丢图片链接），跳过 hub 抓取
+    if len(record["content"]) >= HUB_SKIP_TEXT_LEN:
+        record["url"] = hub_link
+        return record
+    try:
+        title, full_text = fetch_hub_article(hub_link)
+        record["url"] = hub_link
+        record["title"] = title or full_text[:40]
+        record["content"] = full_text or record["content"]
+    except Exception as err:
+        print("Hub fetch failed", hub_link, err)
+    return record
+
+
 def crawl(limit: int = 100, out: str = "ai_era_full.jsonl") -> None:
     uid = lookup_uid(ACCOUNT)
     Path(out).parent.mkdir(parents=True, exist_ok=True)
 
-    saved = 0
-    max_id: Optional[str] = None
-    with open(out, "w", encoding="utf-8") as fp:
-        pbar = tqdm(total=limit, desc=f"Crawling @{ACCOUNT}")
-        while saved < limit:
-            statuses = fetch_statuses(uid, max_id)
-            if not statuses:
-                break
-            for st in statuses:
-                if saved >= limit:
+    # 流水线：分页生产者线程 → 线程池补全 hub 正文 → 主线程按序写出。
+    # 翻页 RTT（含礼貌间隔）与 hub 抓取重叠，不再等整页详情完成才翻下一页
+    q_in: queue.Queue = queue.Queue(maxsize=2 * PER_PAGE)
+    q_out: queue.Queue = queue.Queue()
+    _DONE = object()  # 每个 worker 收到 None 哨兵后向 q_out 投递一次
+
+    def produce() -> None:
+        fetched = 0
+        max_id: Optional[str] = None
+        try:
+            while fetched < limit:
+                statuses = fetch_statuses(uid, max_id)
+                if not statuses:
                     break
-                record = parse_status(st)
-                fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+                for st in statuses[: limit - fetched]:
+                    q_in.put((fetched, parse_status_meta(st)))
+                    fetched += 1
+                max_id = statuses[-1]["id"]
+        except Exception as err:
+            print("Pagination failed", err)
+        finally:
+            for _ in range(MAX_WORKERS):
+                q_in.put(None)
+
+    def work() -> None:
+        while True:
+            task = q_in.get()
+            if task is None:
+                q_out.put(_DONE)
+                return
+            idx, record = task
+            q_out.put((idx, enrich_with_hub(record)))
+
+    saved = 0
+    next_idx = 0
+    pending: dict[int, dict] = {}
+    done_workers = 0
+    # 二进制 1 MB 写缓冲；dumps_line 在装了 orjson 时走 C 编码器
+    with open(out, "wb", buffering=1 << 20) as fp, ThreadPoolExecutor(max_workers=MAX_WORKERS + 1) as ex:
+        ex.submit(produce)
+        for _ in range(MAX_WORKERS):
+            ex.submit(work)
+
+        # 非 TTY（重定向到日志）时关掉进度条；批量 update 减少重绘和锁竞争
+        pbar = tqdm(total=limit, desc=f"Crawling @{ACCOUNT}", disable=not sys.stdout.isatty())
+        done_since_refresh = 0
+        while done_workers < MAX_WORKERS:
+            item = q_out.get()
+            if item is _DONE:
+                done_workers += 1
+                continue
+            idx, record = item
+            pending[idx] = record
+            # 乱序完成的记录先暂存，按原时间线顺序落盘
+            while next_idx in pending:
+                fp.write(dumps_line(pending.pop(next_idx)))
+                next_idx += 1
                 saved += 1
-                pbar.update(1)
-            max_id = statuses[-1]["id"]
-            time.sleep(random.uniform(1, 2))
+                done_since_refresh += 1
+                if done_since_refresh >= 10:
+                    pbar.update(done_since_refresh)
+                    done_since_refresh = 0
+        pbar.update(done_since_refresh)
         pbar.close()
     print(f"Saved {saved} posts into {out}")
 
@@ -4,103 +4,125 @@ The site renders static HTML (WordPress). Each article link in <article>.
 """
 from __future__ import annotations
 
-import json
-import random
-import time
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-import requests
-from bs4 import BeautifulSoup
+from lxml.cssselect import CSSSelector
 from tqdm import tqdm
 
+# 允许以 `python 量子位/crawl_lzw_api.py` 直接运行时找到仓库根下的 common.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import HostRateLimiter, dumps_line, fromstring, make_session
+
 BASE = "https://www.qbitai.com"
 LIST_URL = BASE + "/"  # 首页
-HEADERS = {"User-Agent": "qbitai-crawler/0.1"}
+HEADERS = {"User-Agent": "qbitai-crawler/0.1", "Accept-Encoding": "gzip, deflate, br"}
+
+# 模块级共享 Session：keep-alive 连接池免去逐请求 TCP+TLS 握手
+SESSION = make_session(HEADERS, pool_connections=10, pool_maxsize=20)
+
+MAX_WORKERS = 8  # 详情页并发上限
+
+# 按主机限速的令牌桶（突发 4）：线程并发之上再保证对站点的礼貌节奏
+_limiter = HostRateLimiter(8.0, burst=4)
+
+# 预编译热路径上的 CSS 选择器，避免每次调用重复编译。
+# 列表页三种版式按优先级分组：合并成联合选择器会把 article 里的
+# tag/作者/评论链接也当成文章，必须保留"前一组命中则不看后一组"的语义
+_LIST_TITLE_SEL = CSSSelector("h2.entry-title a[href]")
+_LIST_ARTICLE_SEL = CSSSelector("article")
+_LIST_BLOCK_SEL = CSSSelector("div.article_list div.picture_text h4 a[href]")
+_TITLE_SEL = CSSSelector("h1.entry-title")
+_CONTENT_SELS = [
+    CSSSelector("div.entry-content"),
+    CSSSelector("div.article-content"),
+    CSSSelector("div.article__content"),
+    CSSSelector("div.article"),
+]
+_DATE_META_SEL = CSSSelector('meta[property="article:published_time"]')
+_DATE_SPAN_SEL = CSSSelector("span.date, span.single_date")
 
 
 def fetch_html(url: str, timeout: int = 20) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=timeout)
+    _limiter.wait(url)
+    r = SESSION.get(url, timeout=timeout)
     r.raise_for_status()
     return r.text
 
 
 def parse_list(html: str) -> List[dict]:
-    soup = BeautifulSoup(html, "lxml")
+    # lxml cssselect 在 C 层完成选择器匹配，比 BeautifulSoup+soupsieve 快得多
+    tree = fromstring(html)
     results = []
-    # Prefer explicit title selector (single-post listing)
-    for a_tag in soup.select("h2.entry-title a[href]"):
-        url = a_tag["href"]
-        title = a_tag.get_text(strip=True)
+    seen = set()
+
+    def add(a_tag) -> None:
+        url = a_tag.get("href")
         if not url.startswith("http"):
             url = BASE + url
-        results.append({"url": url, "title": title})
-    # Fallback to any <article><a>
+        if url not in seen:
+            seen.add(url)
+            results.append({"url": url, "title": a_tag.text_content().strip()})
+
+    # Prefer explicit title selector (single-post listing)
+    for a_tag in _LIST_TITLE_SEL(tree):
+        add(a_tag)
+    # Fallback to any <article><a>（每个 article 只取第一个链接，跳过 tag/作者/评论链）
     if not results:
-        for art in soup.select("article"):
-            a_tag = art.find("a", href=True)
-            if not a_tag:
-                continue
-            url = a_tag["href"]
-            title = a_tag.get_text(strip=True)
-            if not url.startswith("http"):
-                url = BASE + url
-            results.append({"url": url, "title": title})
+        for art in _LIST_ARTICLE_SEL(tree):
+            links = art.cssselect("a[href]")
+            if links:
+                add(links[0])
     # Second fallback: homepage blocks
     if not results:
-        for a_tag in soup.select("div.article_list div.picture_text h4 a[href]"):
-            url = a_tag["href"]
-            title = a_tag.get_text(strip=True)
-            if not url.startswith("http"):
-                url = BASE + url
-            results.append({"url": url, "title": title})
+        for a_tag in _LIST_BLOCK_SEL(tree):
+            add(a_tag)
     return results
 
 
 def fetch_detail(url: str) -> tuple[str, str, str]:
     """Return (title, date, content)"""
     html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
+    tree = fromstring(html)
 
-    title_tag = soup.select_one("h1.entry-title") or soup.select_one("h1")
-    title = title_tag.get_text(strip=True) if title_tag else ""
+    title_nodes = _TITLE_SEL(tree) or tree.xpath("//h1")
+    title = title_nodes[0].text_content().strip() if title_nodes else ""
 
-    content_node = (
-        soup.select_one("div.entry-content")
-        or soup.select_one("div.article-content")
-        or soup.select_one("div.article__content")
-        or soup.select_one("div.article")
-    )
-
-    def absolutize(u: str) -> str:
-        return u if u.startswith("http") else BASE + u
+    content_nodes = []
+    for sel in _CONTENT_SELS:
+        content_nodes = sel(tree)
+        if content_nodes:
+            break
 
     def collect_parts(node) -> str:
         segments = []
-        for child in node.descendants:
-            if getattr(child, "name", None) == "img":
-                url = child.get("src") or child.get("data-src") or child.get("data-original")
-                if url:
-                    segments.append(absolutize(url))
-            else:
-                txt = BeautifulSoup(str(child), "lxml").get_text(" ", strip=True)
+        # 单次 XPath 联合查询，按文档序取回文本节点与图片，C 层完成整棵树遍历
+        # （原实现对每个非 img 节点重建一次 BeautifulSoup，长文上是 O(N²)）；
+        # 补前缀的判断内联在循环里，省掉逐图片的函数调用
+        for item in node.xpath(".//text() | .//img"):
+            if isinstance(item, str):
+                txt = " ".join(item.split())
                 if txt:
                     segments.append(txt)
+            else:
+                u = item.get("src") or item.get("data-src") or item.get("data-original")
+                if u:
+                    segments.append(u if u[:4] == "http" else BASE + u)
         return " ".join(segments).strip()
 
-    if content_node:
-        text = collect_parts(content_node)
-    else:
-        text = ""
+    text = collect_parts(content_nodes[0]) if content_nodes else ""
 
     # date extraction: meta tag or span.single_date
-    date_meta = soup.select_one('meta[property="article:published_time"]')
-    date_span = soup.select_one('span.date') or soup.select_one('span.single_date')
     date = ""
-    if date_meta and date_meta.has_attr('content'):
-        date = date_meta['content'][:10]
-    elif date_span:
-        date = date_span.get_text(strip=True)[:10]
+    date_metas = _DATE_META_SEL(tree)
+    if date_metas and date_metas[0].get("content"):
+        date = date_metas[0].get("content")[:10]
+    else:
+        date_spans = _DATE_SPAN_SEL(tree)
+        if date_spans:
+            date = date_spans[0].text_content().strip()[:10]
 
     return title, date, text
 
@@ -119,9 +141,31 @@ def crawl(limit: int = 30, out: str = "qbitai_articles.jsonl") -> None:
 
     items = parse_list(list_html)[:limit]
 
-    with open(out, "w", encoding="utf-8") as fp:
-        for item in tqdm(items, desc="Crawling"):
-            title2, date, content = fetch_detail(item["url"])
+    # 线程池并发抓详情（I/O 等待期间释放 GIL），结果按原列表顺序写出
+    results: List[Optional[tuple[str, str, str]]] = [None] * len(items)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        futures = {ex.submit(fetch_detail, it["url"]): i for i, it in enumerate(items)}
+        # 非 TTY 时关掉进度条；miniters 批量刷新减少重绘
+        for fut in tqdm(
+            as_completed(futures),
+            total=len(items),
+            desc="Crawling",
+            miniters=10,
+            disable=not sys.stdout.isatty(),
+        ):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as err:
+                print("skip", items[i]["url"], err)
+
+    saved = 0
+    # 二进制 1 MB 写缓冲；dumps_line 在装了 orjson 时走 C 编码器
+    with open(out, "wb", buffering=1 << 20) as fp:
+        for item, res in zip(items, results):
+            if res is None:
+                continue
+            title2, date, content = res
             # # DEBUG disabled: save empty content pages
             # if not content:
             #     try:
@@ -136,9 +180,9 @@ def crawl(limit: int = 30, out: str = "qbitai_articles.jsonl") -> None:
                 "date": date,
                 "content": content,
             }
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
-            time.sleep(random.uniform(1, 2))
-    print(f"Saved {len(items)} articles into {out}")
+            fp.write(dumps_line(record))
+            saved += 1
+    print(f"Saved {saved} / {len(items)} articles into {out}")
 
 
 if __name__ == "__main__":